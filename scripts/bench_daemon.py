@@ -0,0 +1,74 @@
+"""
+bench_daemon.py - Compare per-invocation latency of `python -m structify`
+with and without a warm Structify daemon.
+
+Usage:
+    python scripts/bench_daemon.py ["<project description>"] [runs]
+
+Without GOOGLE_GEMINI_API_KEY set, Structify falls back to its static
+structure, so this measures interpreter/import/config overhead only.
+With a key set, it also includes the (pooled vs. fresh) HTTPS connection cost.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+def run_cli(description: str, output_dir: str, env: dict) -> float:
+    """Run one CLI invocation and return its wall-clock latency in seconds."""
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "structify", description, output_dir],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        check=True,
+    )
+    return time.perf_counter() - start
+
+
+def bench(label: str, description: str, output_dir: str, env: dict, runs: int) -> None:
+    timings = [run_cli(description, output_dir, env) for _ in range(runs)]
+    print(
+        f"{label:<16} mean {statistics.mean(timings) * 1000:8.1f} ms   "
+        f"median {statistics.median(timings) * 1000:8.1f} ms   "
+        f"min {min(timings) * 1000:8.1f} ms"
+    )
+
+
+def main() -> None:
+    description = sys.argv[1] if len(sys.argv) > 1 else "Flask app"
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        socket_path = str(Path(tmpdir) / "structify-bench.sock")
+        output_dir = str(Path(tmpdir) / "out")
+        env = dict(os.environ, STRUCTIFY_DAEMON_SOCKET=socket_path)
+
+        print(f"Benchmarking {runs} runs of: python -m structify {description!r}")
+        bench("without daemon", description, output_dir, env, runs)
+
+        daemon = subprocess.Popen(
+            [sys.executable, "-m", "structify", "daemon", "0"],
+            env=env,
+            stdout=subprocess.DEVNULL,
+        )
+        try:
+            deadline = time.monotonic() + 30
+            while not os.path.exists(socket_path):
+                if daemon.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("Structify daemon failed to start")
+                time.sleep(0.05)
+            bench("with daemon", description, output_dir, env, runs)
+        finally:
+            subprocess.run([sys.executable, "-m", "structify", "daemon", "stop"], env=env, stdout=subprocess.DEVNULL)
+            daemon.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,31 +10,40 @@ Usage:
 
 2. As a command-line tool:
    $ python -m structify "Flask app with PostgreSQL and Docker"
+   $ python -m structify --hierarchical "Microservices platform with auth, billing, admin UI"
+
+3. With a warm resident daemon (see structify.daemon):
+   $ python -m structify daemon
 """
 
-from dotenv import load_dotenv
-load_dotenv()
 import sys
 from pathlib import Path
-from .core.parser import parse
-from .core.generator import generate_project as _generate_project
 
-def generate_project(description: str, output_dir: str = "generated_project") -> None:
+def generate_project(description: str, output_dir: str = "generated_project", hierarchical: bool = False) -> None:
     """
     Generate a project structure based on the given description.
 
     Args:
         description (str): Natural language description of the project.
         output_dir (str): Directory where the project will be created.
+        hierarchical (bool): Split large, multi-subsystem descriptions into
+                             subsystems and parse them concurrently.
 
     Example:
         >>> generate_project("Flask app with PostgreSQL", "my_flask_app")
     """
+    # Imported lazily so the CLI can hand off to a running daemon without
+    # paying for requests/yaml/dotenv imports
+    from dotenv import load_dotenv
+    load_dotenv()
+    from .core.parser import parse, parse_hierarchical
+    from .core.generator import generate_project as _generate_project
+
     base = Path(output_dir)
     base.mkdir(parents=True, exist_ok=True)
 
     # 1. Parse description into a structured definition (OpenRouter-powered parsing)
-    project_spec = parse(description)
+    project_spec = parse_hierarchical(description) if hierarchical else parse(description)
 
     # 2. Generate project scaffold from the parsed spec
     _generate_project(project_spec, str(base))
@@ -45,17 +54,60 @@ def _main():
     """
     Allow Structify to run directly from the command line.
 
+    If a Structify daemon is running, the request is forwarded to it;
+    otherwise the project is generated in-process.
+
     Example:
         $ python -m structify "Flask app with PostgreSQL"
+        $ python -m structify --hierarchical "Microservices platform with auth, billing"
+        $ python -m structify daemon [idle_timeout_seconds | stop]
     """
-    if len(sys.argv) < 2:
-        print('Usage: python -m structify "<project description>" [output_dir]')
+    args = sys.argv[1:]
+    hierarchical = "--hierarchical" in args
+    if hierarchical:
+        args.remove("--hierarchical")
+
+    usage = (
+        'Usage: python -m structify [--hierarchical] "<project description>" [output_dir]\n'
+        "       python -m structify daemon [idle_timeout_seconds | stop]"
+    )
+    if not args:
+        print(usage)
         sys.exit(1)
 
-    description = sys.argv[1]
-    output_dir = sys.argv[2] if len(sys.argv) > 2 else "generated_project"
+    if args[0] == "daemon":
+        from .daemon import serve, stop
+        arg = args[1] if len(args) > 1 else None
+        if arg == "stop":
+            if not stop():
+                print("[⚠️] No Structify daemon is running.")
+            return
+        try:
+            idle_timeout = float(arg) if arg else None
+        except ValueError:
+            print(f"[ERROR] Invalid idle timeout: {arg!r}")
+            print(usage)
+            sys.exit(1)
+        serve(idle_timeout)
+        return
 
-    generate_project(description, output_dir)
+    description = args[0]
+    output_dir = args[1] if len(args) > 1 else "generated_project"
+
+    from .daemon import forward_generate
+    try:
+        reply = forward_generate(description, output_dir, hierarchical=hierarchical)
+    except ConnectionError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    if reply is None:
+        generate_project(description, output_dir, hierarchical)
+        return
+
+    print(reply.get("output", ""), end="")
+    if not reply.get("ok"):
+        print(f"[ERROR] Structify daemon failed: {reply.get('error')}")
+        sys.exit(1)
 
 # Run CLI only if executed directly
 if __name__ == "__main__":
@@ -3,10 +3,11 @@ Core module of Structify.
 Exposes the main parsing and project generation APIs.
 """
 
-from .parser import parse
+from .parser import parse, parse_hierarchical
 from .generator import generate_project
 
 __all__ = [
     "parse",
+    "parse_hierarchical",
     "generate_project",
 ]
\ No newline at end of file
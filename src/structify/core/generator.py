@@ -7,20 +7,17 @@ After all files/folders are created, generates a single AI-powered helper file v
 """
 
 from pathlib import Path
-import yaml
 import re
 from datetime import datetime
 
-from ..config import CONFIG_PATH
+from ..config import CONFIG
 from .utils import ensure_dir, write_file, safe_join
 from .templates import create_helper_file  # <-- NEW
 
 def load_defaults(project_type: str) -> dict:
     """Load default project structure from YAML. Used only as fallback if AI fails."""
     try:
-        with open(CONFIG_PATH, "r") as f:
-            defaults = yaml.safe_load(f)
-        return defaults.get(project_type, defaults.get("generic", {}))
+        return CONFIG.get(project_type, CONFIG.get("generic", {}))
     except Exception as e:
         print(f"[⚠️] Failed to load defaults: {e}")
         return {"folders": ["src"], "files": ["README.md", "main.py"]}
@@ -1,12 +1,42 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+import contextvars
 import os
+import re
 import requests
+import threading
 import time
-from typing import List, Tuple
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
-def google_gemini_2_5_flash_request(prompt: str, max_tokens: int = 4096, retries: int = 3) -> str:
+# Hierarchical parsing: token budget of the cheap split call (run without thinking) and max concurrent subsystem calls
+SPLIT_MAX_TOKENS = 1024
+MAX_SUBSYSTEM_WORKERS = 8
+
+# requests.Session is not guaranteed thread-safe (cookies, adapter mounts), so each thread
+# (hierarchical workers, daemon clients) gets its own session. They all mount one shared
+# HTTPAdapter, whose urllib3 connection pool is thread-safe, so HTTPS connections are still
+# pooled across threads and requests.
+_ADAPTER = HTTPAdapter(pool_connections=4, pool_maxsize=2 * MAX_SUBSYSTEM_WORKERS)
+_local = threading.local()
+
+def _session() -> requests.Session:
+    """Return this thread's requests.Session, backed by the shared connection pool."""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.mount("https://", _ADAPTER)
+        _local.session = session
+    return session
+
+def google_gemini_2_5_flash_request(
+    prompt: str,
+    max_tokens: int = 4096,
+    retries: int = 3,
+    thinking_budget: Optional[int] = None
+) -> str:
     api_key = os.getenv("GOOGLE_GEMINI_API_KEY")
     if not api_key:
         raise ValueError("GOOGLE_GEMINI_API_KEY is not set in environment variables or .env file")
@@ -23,9 +53,12 @@ def google_gemini_2_5_flash_request(prompt: str, max_tokens: int = 4096, retries
             "maxOutputTokens": max_tokens
         }
     }
+    # Thinking tokens count against maxOutputTokens; 0 disables thinking for short, cheap calls
+    if thinking_budget is not None:
+        payload["generationConfig"]["thinkingConfig"] = {"thinkingBudget": thinking_budget}
     for attempt in range(retries):
         print(f"[DEBUG] Sending request to Gemini 2.5 Flash API... Attempt {attempt+1}")
-        response = requests.post(url, headers=headers, json=payload, timeout=120)
+        response = _session().post(url, headers=headers, json=payload, timeout=120)
         print(f"[DEBUG] Gemini API HTTP status: {response.status_code}")
         try:
             data = response.json()
@@ -60,6 +93,10 @@ def google_gemini_2_5_flash_request(prompt: str, max_tokens: int = 4096, retries
                 continue  # Retry
             # Any other error, raise
             raise RuntimeError(f"Gemini API error: {error.get('message', 'Unknown error')}")
+        # Output budget exhausted (e.g. by thinking) before any text was produced
+        candidate = (data.get("candidates") or [{}])[0]
+        if candidate.get("finishReason") == "MAX_TOKENS" and not (candidate.get("content") or {}).get("parts"):
+            raise RuntimeError(f"Gemini response hit max_tokens={max_tokens} before producing any text")
         # Handle expected response
         try:
             return data["candidates"][0]["content"]["parts"][0]["text"].strip()
@@ -71,16 +108,46 @@ def google_gemini_2_5_flash_request(prompt: str, max_tokens: int = 4096, retries
     # If we exhausted retries, fallback
     raise RuntimeError("Gemini API quota exceeded - retries exhausted.")
 
-def smart_ai_request(prompt: str, max_tokens: int = 4096) -> Tuple[str, str]:
+def smart_ai_request(prompt: str, max_tokens: int = 4096, thinking_budget: Optional[int] = None) -> Tuple[str, str]:
     print("[DEBUG] Trying Google Gemini 2.5 Flash API...")
     try:
-        content = google_gemini_2_5_flash_request(prompt, max_tokens)
+        content = google_gemini_2_5_flash_request(prompt, max_tokens, thinking_budget=thinking_budget)
         print("[DEBUG] Google Gemini 2.5 Flash succeeded.")
         return "google/gemini-2.5-flash", content
     except Exception as e:
         print(f"[ERROR] Gemini AI failed after retries. {str(e)}")
         raise
 
+def _parse_sections(text: str) -> Dict[str, object]:
+    """
+    Parse the plain-text AI output format into its sections.
+
+    Returns a dict with project_name, project_type and the 'features',
+    'subsystems', 'folders' and 'files' lists ('- ' items per section).
+    """
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+
+    result: Dict[str, object] = {"project_name": "", "project_type": "generic"}
+    lists: Dict[str, List[str]] = {name: [] for name in ("features", "subsystems", "folders", "files")}
+
+    section = None
+    for line in lines:
+        if line.lower().startswith("project name:"):
+            result["project_name"] = line.split(":", 1)[1].strip()
+            section = None
+        elif line.lower().startswith("project type:"):
+            result["project_type"] = line.split(":", 1)[1].strip()
+            section = None
+        elif line.endswith(":") and line[:-1].lower() in lists:
+            section = line[:-1].lower()
+        elif line.startswith("-"):
+            item = line[1:].strip()
+            if section in lists:
+                lists[section].append(item)
+
+    result.update(lists)
+    return result
+
 def parse(description: str):
     prompt = f"""
 You are an AI project scaffolding assistant.
@@ -112,36 +179,12 @@ Files:
     try:
         used_model, text = smart_ai_request(prompt)
         print("[DEBUG] AI response received.")
-        lines = [line.strip() for line in text.splitlines() if line.strip()]
-
-        project_name = ""
-        project_type = "generic"
-        features: List[str] = []
-        folders: List[str] = []
-        files: List[str] = []
-
-        section = None
-        for line in lines:
-            if line.lower().startswith("project name:"):
-                project_name = line.split(":", 1)[1].strip()
-                section = None
-            elif line.lower().startswith("project type:"):
-                project_type = line.split(":", 1)[1].strip()
-                section = None
-            elif line.lower() == "features:":
-                section = "features"
-            elif line.lower() == "folders:":
-                section = "folders"
-            elif line.lower() == "files:":
-                section = "files"
-            elif line.startswith("-"):
-                item = line[1:].strip()
-                if section == "features":
-                    features.append(item)
-                elif section == "folders":
-                    folders.append(item)
-                elif section == "files":
-                    files.append(item)
+        sections = _parse_sections(text)
+        project_name = sections["project_name"]
+        project_type = sections["project_type"]
+        features = sections["features"]
+        folders = sections["folders"]
+        files = sections["files"]
 
         if not folders:
             print("[WARN] No folders parsed from AI output, using fallback.")
@@ -174,6 +217,194 @@ Files:
             "description": description
         }
 
+def _split_subsystem_item(item: str) -> Tuple[str, str]:
+    """Split a '- name: summary' subsystem item into (name, summary)."""
+    name, _, summary = item.partition(":")
+    return name.strip().strip("`*"), summary.strip()
+
+def _subsystem_folder(name: str) -> str:
+    """Folder name for a subsystem, e.g. 'Admin UI' -> 'admin_ui'."""
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_") or "subsystem"
+
+def _normalize_paths(paths: List[str]) -> List[str]:
+    """Normalize AI-produced paths ('./a/b/' -> 'a/b') so duplicates compare equal."""
+    normalized = []
+    for path in paths:
+        path = path.strip().replace("\\", "/")
+        while path.startswith("./"):
+            path = path[2:]
+        path = path.strip("/")
+        if path and path != ".":
+            normalized.append(path)
+    return normalized
+
+def _resolve_path_conflicts(folders: List[str], files: List[str]) -> Tuple[List[str], List[str]]:
+    """
+    Drop files whose path is also used as a folder (listed or implied by a nested path).
+
+    Folders win, since other subsystems already place files inside them.
+    """
+    dirs = set(folders)
+    for path in folders + files:
+        parts = path.split("/")
+        for i in range(1, len(parts)):
+            dirs.add("/".join(parts[:i]))
+
+    kept_files = []
+    for file in files:
+        if file in dirs:
+            print(f"[WARN] Path conflict: '{file}' is both a file and a folder, keeping the folder.")
+            continue
+        kept_files.append(file)
+    return folders, kept_files
+
+def _split_subsystems(description: str) -> Tuple[str, Dict[str, object]]:
+    """First phase: a cheap call splitting the description into subsystems."""
+    prompt = f"""
+You are an AI project scaffolding assistant.
+Split the following project description into its major subsystems
+(services, frontends, infrastructure, shared libraries, etc).
+
+Project Description: {description}
+
+Instructions:
+1. Provide Project Name on a single line: Project Name: <name>
+2. Provide Project Type on a single line: Project Type: <type>
+3. List project-wide Features (technologies, APIs, auth, DBs, etc.) with '- ' per feature
+4. List Subsystems with '- <name>: <one-line summary>' per subsystem
+5. Do NOT list folders or files.
+6. Output in plain text exactly like this format:
+
+Project Name: ...
+Project Type: ...
+Features:
+- ...
+Subsystems:
+- auth: ...
+- billing: ...
+"""
+    used_model, text = smart_ai_request(prompt, max_tokens=SPLIT_MAX_TOKENS, thinking_budget=0)
+    return used_model, _parse_sections(text)
+
+def _parse_subsystem(description: str, project_name: str, name: str, summary: str) -> Dict[str, object]:
+    """Second phase: parse the folders and files of a single subsystem."""
+    folder = _subsystem_folder(name)
+    prompt = f"""
+You are an AI project scaffolding assistant.
+You are scaffolding ONE subsystem of a larger project.
+
+Project Name: {project_name}
+Project Description: {description}
+Subsystem: {name}
+Subsystem Summary: {summary}
+
+Instructions:
+1. Only output the structure of this subsystem.
+2. Place its folders and files under the '{folder}/' folder. Only list root-level files
+   (e.g. README.md, docker-compose.yml) if this subsystem needs them.
+3. List Features of this subsystem with '- ' per feature
+4. List Folders hierarchically with '- ' per folder, use '/' for nested folders
+5. List Files with '- ' per file, use folder paths if needed
+6. Output in plain text exactly like this format:
+
+Features:
+- ...
+Folders:
+- {folder}/
+- {folder}/subfolder/
+Files:
+- {folder}/file1.ext
+- {folder}/subfolder/file2.ext
+"""
+    print(f"[DEBUG] Parsing subsystem '{name}' with AI...")
+    try:
+        _, text = smart_ai_request(prompt)
+        return _parse_sections(text)
+    except Exception as e:
+        print(f"[WARN] Subsystem '{name}' failed, using its folder only. Exception: {e}")
+        return {"features": [], "folders": [folder], "files": []}
+
+def parse_hierarchical(description: str, max_workers: int = MAX_SUBSYSTEM_WORKERS):
+    """
+    Two-phase parse for large, multi-subsystem descriptions.
+
+    A cheap first call splits the description into subsystems, then each
+    subsystem's folders and files are parsed concurrently and merged into one
+    spec (deduplicated with merge_structures semantics, path conflicts resolved).
+    Latency is bounded by the slowest subsystem instead of the total output length,
+    and each subsystem gets its own max_tokens budget.
+
+    Falls back to a single-pass parse() if the description has fewer than two subsystems.
+    Returns the same keys as parse(), plus 'subsystems'.
+    """
+    from .generator import merge_structures
+
+    print("[DEBUG] Splitting project description into subsystems with AI...")
+    try:
+        used_model, overview = _split_subsystems(description)
+    except Exception as e:
+        print(
+            "[WARN] Hierarchical parse: subsystem split failed, falling back to single-pass parse "
+            "(large structures may be truncated). Exception:", e
+        )
+        return parse(description)
+
+    subsystems = [_split_subsystem_item(item) for item in overview["subsystems"]]
+    subsystems = [(name, summary) for name, summary in subsystems if name]
+    if len(subsystems) < 2:
+        print(
+            f"[WARN] Hierarchical parse: found {len(subsystems)} subsystem(s), "
+            "falling back to single-pass parse."
+        )
+        return parse(description)
+
+    print(f"[DEBUG] Parsing {len(subsystems)} subsystems concurrently...")
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(subsystems)))) as executor:
+        # Run each subsystem in a copy of the caller's context, so per-request
+        # state (e.g. the daemon's output capture) follows it into the worker threads
+        futures = [
+            executor.submit(
+                contextvars.copy_context().run,
+                _parse_subsystem, description, overview["project_name"], name, summary,
+            )
+            for name, summary in subsystems
+        ]
+        parts = [future.result() for future in futures]
+
+    merged: Dict[str, List[str]] = {"folders": [], "files": []}
+    features: List[str] = list(overview["features"])
+    for part in parts:
+        merged = merge_structures(merged, {
+            "folders": _normalize_paths(part["folders"]),
+            "files": _normalize_paths(part["files"]),
+        })
+        features.extend(part["features"])
+
+    folders, files = _resolve_path_conflicts(merged["folders"], merged["files"])
+    if not files:
+        print("[WARN] No files parsed from subsystems, using fallback.")
+        files = ["README.md", "main.py"]
+
+    seen = set()
+    unique_features = []
+    for feature in features:
+        if feature.lower() not in seen:
+            seen.add(feature.lower())
+            unique_features.append(feature)
+
+    result = {
+        "project_name": overview["project_name"],
+        "project_type": overview["project_type"],
+        "features": unique_features,
+        "folders": folders or ["src"],
+        "files": files,
+        "subsystems": [name for name, _ in subsystems],
+        "used_model": used_model,
+        "description": description
+    }
+    print("[DEBUG] Parsed hierarchical structure:", result)
+    return result
+
 if __name__ == "__main__":
     description = "An Android e-commerce app with user authentication, shopping cart, and Firebase backend"
     structure = parse(description)
@@ -0,0 +1,423 @@
+"""
+Daemon module for Structify.
+
+Keeps a resident Structify process warm behind a Unix domain socket, so repeated
+`python -m structify` invocations skip re-importing requests, yaml and dotenv,
+re-reading config and re-opening HTTPS connections.
+
+Usage:
+   $ python -m structify daemon          # start (idle timeout from defaults.yaml)
+   $ python -m structify daemon 300      # start with a 300 second idle timeout
+   $ python -m structify daemon stop     # stop a running daemon
+
+The CLI forwards its request to the daemon when the socket is reachable and
+falls back to in-process execution otherwise. Each connection is handled on
+its own thread, so parallel invocations are served concurrently.
+
+Protocol (one JSON object per line):
+   daemon -> client   {"status": "ready"}
+   client -> daemon   {"command": "generate" | "ping" | "stop", ...}
+   daemon -> client   {"ok": bool, "output": str, "error": str}
+
+The client only sends its request after the daemon is ready, so a client that
+gives up waiting can safely run in-process without the work running twice.
+
+Each generate request carries a fingerprint of the client's environment
+(GOOGLE_GEMINI_API_KEY) and of the installed Structify sources. If it differs
+from the daemon's (different key, or the package changed after the daemon
+started), the daemon refuses the request and the client runs it in-process.
+
+Only the standard library is imported at module level, so the client side
+stays cheap.
+"""
+
+import contextlib
+import contextvars
+import hashlib
+import io
+import json
+import os
+import socket
+import stat
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+# Override the socket location (e.g. for several daemons or benchmarks)
+SOCKET_ENV_VAR = "STRUCTIFY_DAEMON_SOCKET"
+
+# Seconds the CLI waits for the daemon to be ready before running in-process
+CONNECT_TIMEOUT = 0.5
+
+# Seconds ping/stop and a starting daemon wait for an existing daemon to answer
+CONTROL_TIMEOUT = 5.0
+
+# Seconds between idle/stop checks in the accept loop
+POLL_INTERVAL = 0.5
+
+DEFAULT_IDLE_TIMEOUT = 600
+
+# Environment variables that must match between client and daemon
+FINGERPRINT_ENV_VARS = ("GOOGLE_GEMINI_API_KEY",)
+
+
+def supports_daemon() -> bool:
+    """Check if this platform supports Unix domain sockets."""
+    return hasattr(socket, "AF_UNIX") and hasattr(os, "getuid")
+
+
+def socket_path() -> str:
+    """
+    Return the daemon socket path.
+
+    Uses $STRUCTIFY_DAEMON_SOCKET if set, otherwise $XDG_RUNTIME_DIR/structify.sock,
+    otherwise a socket inside a private (0700) per-user directory in the temp dir.
+    """
+    path = os.getenv(SOCKET_ENV_VAR)
+    if path:
+        return path
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, "structify.sock")
+    return os.path.join(_private_dir(), "daemon.sock")
+
+
+def _private_dir() -> str:
+    """Per-user socket directory in the (shared) temp dir."""
+    return os.path.join(tempfile.gettempdir(), f"structify-{os.getuid()}")
+
+
+def _ensure_private_dir() -> None:
+    """Create the per-user socket directory if needed and make sure only we can use it."""
+    directory = _private_dir()
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    st = os.lstat(directory)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise RuntimeError(f"Refusing to use {directory}: it must be a directory owned by you with mode 0700")
+
+
+def _is_own_socket(path: str) -> bool:
+    """Check that path is a socket owned by the current user."""
+    try:
+        st = os.lstat(path)
+    except FileNotFoundError:
+        return False
+    return stat.S_ISSOCK(st.st_mode) and st.st_uid == os.getuid()
+
+
+def fingerprint() -> str:
+    """
+    Hash of the relevant environment variables and the installed package sources
+    (path, size and mtime of every .py/.yaml file), used to detect a daemon
+    running with a different API key or outdated code.
+    """
+    digest = hashlib.sha256()
+    for name in FINGERPRINT_ENV_VARS:
+        digest.update(f"{name}={os.environ.get(name, '')}\0".encode("utf-8"))
+    package_dir = Path(__file__).resolve().parent
+    for file in sorted(package_dir.rglob("*")):
+        if file.suffix in (".py", ".yaml"):
+            st = file.stat()
+            digest.update(f"{file.relative_to(package_dir)}:{st.st_size}:{st.st_mtime_ns}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _encode(message: dict) -> bytes:
+    return (json.dumps(message) + "\n").encode("utf-8")
+
+
+def _request(message: dict, path: Optional[str] = None, ready_timeout: float = CONNECT_TIMEOUT) -> Optional[dict]:
+    """
+    Send a single request to the daemon and return its reply.
+
+    Returns None if no daemon is ready within `ready_timeout`; in that case the
+    request was never sent, so the caller can safely run it in-process instead.
+    Once the request is sent a missing reply is an error, since the work may
+    already have been done.
+    """
+    if not supports_daemon():
+        return None
+    path = path or socket_path()
+    if not os.path.exists(path):
+        return None
+    if not _is_own_socket(path):
+        print(f"[⚠️] Ignoring Structify daemon socket {path}: not a socket owned by you.")
+        return None
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.settimeout(ready_timeout)
+            sock.connect(path)
+            reader = sock.makefile("r", encoding="utf-8")
+            ready = reader.readline()
+        except OSError:
+            return None
+        with reader:
+            if not ready:
+                return None
+
+            # Ready: generation may take a while, so wait without a timeout
+            sock.settimeout(None)
+            sock.sendall(_encode(message))
+            reply = reader.readline()
+    if not reply:
+        raise ConnectionError("Structify daemon closed the connection without replying")
+    return json.loads(reply)
+
+
+def forward_generate(
+    description: str,
+    output_dir: str,
+    path: Optional[str] = None,
+    hierarchical: bool = False,
+) -> Optional[dict]:
+    """
+    Forward a generate request to a running daemon.
+
+    Args:
+        description (str): Natural language description of the project.
+        output_dir (str): Output directory, resolved against the caller's cwd.
+        path (str): Socket path (defaults to socket_path()).
+        hierarchical (bool): Use the two-phase, per-subsystem parse.
+
+    Returns:
+        dict: Reply with 'ok', 'output' and optionally 'error',
+              or None if no daemon is running or its fingerprint differs.
+    """
+    reply = _request(
+        {
+            "command": "generate",
+            "description": description,
+            "output_dir": str(Path(output_dir).resolve()),
+            "hierarchical": hierarchical,
+            "fingerprint": fingerprint(),
+        },
+        path,
+    )
+    if reply is not None and reply.get("mismatch"):
+        print(f"[⚠️] {reply.get('error')} Running in-process instead.")
+        return None
+    return reply
+
+
+def ping(path: Optional[str] = None) -> bool:
+    """Check if a daemon is listening on the socket."""
+    return _request({"command": "ping"}, path, CONTROL_TIMEOUT) is not None
+
+
+def stop(path: Optional[str] = None) -> bool:
+    """
+    Ask a running daemon to shut down. Returns False if none was running.
+
+    Requests already in flight are finished before the daemon exits.
+    """
+    return _request({"command": "stop"}, path, CONTROL_TIMEOUT) is not None
+
+
+# Output buffer of the request being handled in the current context
+_CAPTURE: contextvars.ContextVar[Optional[io.StringIO]] = contextvars.ContextVar("structify_capture", default=None)
+
+
+class _ContextOutput:
+    """
+    sys.stdout replacement that routes writes to the current request's buffer
+    while it is being captured, and to the original stream otherwise.
+
+    The buffer lives in a ContextVar, so threads a request starts with a copied
+    context (e.g. hierarchical parsing workers) write to the same buffer.
+    """
+
+    def __init__(self, default):
+        self._default = default
+
+    def write(self, text: str) -> int:
+        buffer = _CAPTURE.get()
+        return (buffer if buffer is not None else self._default).write(text)
+
+    def flush(self) -> None:
+        buffer = _CAPTURE.get()
+        (buffer if buffer is not None else self._default).flush()
+
+    def __getattr__(self, name):
+        return getattr(self._default, name)
+
+    @contextlib.contextmanager
+    def capture(self):
+        buffer = io.StringIO()
+        token = _CAPTURE.set(buffer)
+        try:
+            yield buffer
+        finally:
+            _CAPTURE.reset(token)
+
+
+def _handle(
+    conn: socket.socket,
+    generate_project: Callable[..., None],
+    output: _ContextOutput,
+    stop_event: threading.Event,
+    daemon_fingerprint: str,
+) -> None:
+    """Handle a single client connection."""
+    conn.sendall(_encode({"status": "ready"}))
+    with conn.makefile("r", encoding="utf-8") as reader:
+        line = reader.readline()
+    if not line:
+        return  # client gave up before sending its request
+    message = json.loads(line)
+    command = message.get("command") if isinstance(message, dict) else None
+
+    if not isinstance(message, dict):
+        reply = {"ok": False, "output": "", "error": "Invalid request: expected a JSON object"}
+    elif command == "ping":
+        reply = {"ok": True, "output": ""}
+    elif command == "stop":
+        stop_event.set()
+        reply = {"ok": True, "output": ""}
+    elif command == "generate" and message.get("fingerprint") != daemon_fingerprint:
+        reply = {
+            "ok": False,
+            "mismatch": True,
+            "output": "",
+            "error": "Structify daemon was started with a different API key or package version "
+                     "(restart it with `python -m structify daemon stop`).",
+        }
+    elif command == "generate":
+        # Capture everything printed during generation and relay it to the client
+        with output.capture() as buffer:
+            try:
+                generate_project(
+                    message["description"],
+                    message["output_dir"],
+                    hierarchical=message.get("hierarchical", False),
+                )
+                reply = {"ok": True, "output": buffer.getvalue()}
+            except Exception as e:
+                reply = {"ok": False, "output": buffer.getvalue(), "error": str(e)}
+    else:
+        reply = {"ok": False, "output": "", "error": f"Unknown command: {command}"}
+
+    conn.sendall(_encode(reply))
+
+
+def _check_not_running(path: str) -> None:
+    """
+    Raise if a daemon is already listening on path, removing a stale socket otherwise.
+
+    Only a refused connection counts as stale; a daemon that is slow to
+    answer is still running.
+    """
+    if not os.path.lexists(path):
+        return
+    if not _is_own_socket(path):
+        raise RuntimeError(f"Refusing to replace {path}: not a socket owned by you")
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CONTROL_TIMEOUT)
+        try:
+            sock.connect(path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            # Stale socket from a daemon that did not exit cleanly
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(path)
+            return
+        except OSError as e:
+            raise RuntimeError(f"A Structify daemon appears to be running at {path} ({e})") from e
+    raise RuntimeError(f"A Structify daemon is already running at {path}")
+
+
+def serve(idle_timeout: Optional[float] = None, path: Optional[str] = None) -> None:
+    """
+    Run the daemon until it is stopped or idle for `idle_timeout` seconds.
+
+    Args:
+        idle_timeout (float): Seconds without requests before shutting down
+                              (defaults to daemon.idle_timeout in defaults.yaml,
+                              0 or less means never).
+        path (str): Socket path (defaults to socket_path()).
+    """
+    if not supports_daemon():
+        raise RuntimeError("Structify daemon requires Unix domain socket support")
+
+    # Fingerprint the environment before warm-up imports load .env, as the client does
+    daemon_fingerprint = fingerprint()
+
+    # Warm up: import requests/yaml/dotenv, load config and the shared HTTPS connection pool once
+    from . import generate_project
+    from .config import CONFIG
+    from .core import generator, parser  # noqa: F401
+
+    if idle_timeout is None:
+        idle_timeout = float((CONFIG.get("daemon") or {}).get("idle_timeout", DEFAULT_IDLE_TIMEOUT))
+    path = path or socket_path()
+
+    if os.path.dirname(path) == _private_dir():
+        _ensure_private_dir()
+    _check_not_running(path)
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o177)  # socket is only accessible to the current user
+    try:
+        server.bind(path)
+    finally:
+        os.umask(old_umask)
+    bound = os.stat(path)
+    server.listen()
+    server.settimeout(min(POLL_INTERVAL, idle_timeout) if idle_timeout > 0 else POLL_INTERVAL)
+    print(f"[✅] Structify daemon listening on {path} (idle timeout: {idle_timeout:g}s)")
+
+    stop_event = threading.Event()
+    lock = threading.Lock()
+    active = 0
+    last_activity = time.monotonic()
+    workers = []
+
+    original_stdout = sys.stdout
+    output = _ContextOutput(original_stdout)
+    sys.stdout = output
+
+    def worker(conn: socket.socket) -> None:
+        nonlocal active, last_activity
+        try:
+            with conn:
+                conn.settimeout(None)
+                _handle(conn, generate_project, output, stop_event, daemon_fingerprint)
+        except (OSError, ValueError) as e:
+            print(f"[⚠️] Structify daemon dropped a bad client connection: {e}")
+        finally:
+            with lock:
+                active -= 1
+                last_activity = time.monotonic()
+
+    try:
+        while not stop_event.is_set():
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                with lock:
+                    idle = active == 0 and idle_timeout > 0 and time.monotonic() - last_activity >= idle_timeout
+                if idle:
+                    print("[DEBUG] Structify daemon idle timeout reached, shutting down.")
+                    break
+                continue
+            with lock:
+                active += 1
+                last_activity = time.monotonic()
+            thread = threading.Thread(target=worker, args=(conn,))
+            thread.start()
+            workers = [w for w in workers if w.is_alive()] + [thread]
+        if stop_event.is_set():
+            print("[DEBUG] Structify daemon stop requested, shutting down.")
+    finally:
+        server.close()
+        # Only remove the socket if it is still ours (not replaced by another daemon)
+        with contextlib.suppress(FileNotFoundError):
+            current = os.stat(path)
+            if (current.st_dev, current.st_ino) == (bound.st_dev, bound.st_ino):
+                os.unlink(path)
+        for thread in workers:
+            thread.join()
+        sys.stdout = original_stdout
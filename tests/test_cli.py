@@ -1,4 +1,6 @@
 import sys
+import pytest
+import structify
 from structify import generate_project
 
 def test_cli_simulation(monkeypatch, tmp_path):
@@ -10,4 +12,75 @@ def test_cli_simulation(monkeypatch, tmp_path):
     outdir = tmp_path / "tmp_project"
     generate_project("Flask app", str(outdir))
     # Optionally check that the directory was created
-    assert outdir.exists()
\ No newline at end of file
+    assert outdir.exists()
+
+def test_main_falls_back_without_daemon(monkeypatch, tmp_path):
+    """
+    Test that the CLI generates in-process when no daemon is running.
+    """
+    from structify import daemon
+    calls = []
+    monkeypatch.setattr(daemon, "forward_generate", lambda *args, **kwargs: None)
+    monkeypatch.setattr(structify, "generate_project", lambda *args: calls.append(args))
+    monkeypatch.setattr(sys, "argv", ["structify", "Flask app", str(tmp_path)])
+    structify._main()
+    assert calls == [("Flask app", str(tmp_path), False)]
+
+def test_main_parses_hierarchical_flag(monkeypatch, tmp_path):
+    """
+    Test that --hierarchical is parsed in any position, alongside output_dir,
+    and passed both to the daemon and to the in-process fallback.
+    """
+    from structify import daemon
+    forwarded = []
+    calls = []
+
+    def fake_forward_generate(description, output_dir, hierarchical=False):
+        forwarded.append((description, output_dir, hierarchical))
+        return None
+
+    monkeypatch.setattr(daemon, "forward_generate", fake_forward_generate)
+    monkeypatch.setattr(structify, "generate_project", lambda *args: calls.append(args))
+
+    monkeypatch.setattr(sys, "argv", ["structify", "--hierarchical", "Platform", str(tmp_path)])
+    structify._main()
+    monkeypatch.setattr(sys, "argv", ["structify", "Platform", str(tmp_path), "--hierarchical"])
+    structify._main()
+
+    assert forwarded == [("Platform", str(tmp_path), True)] * 2
+    assert calls == [("Platform", str(tmp_path), True)] * 2
+
+def test_main_forwards_to_daemon(monkeypatch, capsys):
+    """
+    Test that the CLI prints the daemon's output and does not generate in-process.
+    """
+    from structify import daemon
+    monkeypatch.setattr(daemon, "forward_generate", lambda *args, **kwargs: {"ok": True, "output": "from daemon\n"})
+    monkeypatch.setattr(structify, "generate_project", lambda *args: pytest.fail("ran in-process"))
+    monkeypatch.setattr(sys, "argv", ["structify", "Flask app"])
+    structify._main()
+    assert capsys.readouterr().out == "from daemon\n"
+
+def test_main_rejects_invalid_idle_timeout(monkeypatch, capsys):
+    """
+    Test that an invalid daemon idle timeout prints usage instead of a traceback.
+    """
+    monkeypatch.setattr(sys, "argv", ["structify", "daemon", "foo"])
+    with pytest.raises(SystemExit):
+        structify._main()
+    assert "Usage:" in capsys.readouterr().out
+
+def test_main_reports_daemon_dying_mid_request(monkeypatch, capsys):
+    """
+    Test that a daemon dying after accepting the request prints an error line, not a traceback.
+    """
+    from structify import daemon
+
+    def dead_forward_generate(*args, **kwargs):
+        raise ConnectionError("Structify daemon closed the connection without replying")
+
+    monkeypatch.setattr(daemon, "forward_generate", dead_forward_generate)
+    monkeypatch.setattr(sys, "argv", ["structify", "Flask app"])
+    with pytest.raises(SystemExit):
+        structify._main()
+    assert "[ERROR] Structify daemon closed the connection" in capsys.readouterr().out
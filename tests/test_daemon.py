@@ -0,0 +1,250 @@
+import json
+import os
+import socket
+import threading
+import time
+import pytest
+import structify
+from structify import daemon
+
+def _start_daemon(path, idle_timeout=10):
+    """Run daemon.serve on a background thread and wait until it answers."""
+    thread = threading.Thread(target=daemon.serve, kwargs={"idle_timeout": idle_timeout, "path": path})
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not daemon.ping(path) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return thread
+
+def _stop_daemon(thread, path):
+    assert daemon.stop(path)
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+
+def test_forward_without_daemon_returns_none(tmp_path):
+    """
+    Test that the CLI falls back to in-process execution when no daemon is running.
+    """
+    path = str(tmp_path / "missing.sock")
+    assert daemon.forward_generate("Flask app", str(tmp_path / "out"), path) is None
+
+def test_stop_without_daemon_returns_false(tmp_path):
+    """
+    Test that stop reports that no daemon was running.
+    """
+    assert daemon.stop(str(tmp_path / "missing.sock")) is False
+
+def test_daemon_forwards_generate_and_stops(monkeypatch, tmp_path):
+    """
+    Test that a running daemon handles a forwarded generate request, relays its
+    output, and shuts down on request.
+    """
+    calls = []
+
+    def fake_generate_project(description, output_dir, hierarchical=False):
+        calls.append((description, output_dir))
+        print("[✅] generated")
+
+    monkeypatch.setattr(structify, "generate_project", fake_generate_project)
+    path = str(tmp_path / "d.sock")
+    thread = _start_daemon(path)
+
+    reply = daemon.forward_generate("Flask app", str(tmp_path / "out"), path)
+    assert reply["ok"]
+    assert "[✅] generated" in reply["output"]
+    assert calls == [("Flask app", str((tmp_path / "out").resolve()))]
+
+    _stop_daemon(thread, path)
+    assert not os.path.exists(path)
+
+def test_daemon_forwards_hierarchical(monkeypatch, tmp_path):
+    """
+    Test that forward_generate(..., hierarchical=True) reaches generate_project.
+    """
+    calls = []
+
+    def fake_generate_project(description, output_dir, hierarchical=False):
+        calls.append(hierarchical)
+
+    monkeypatch.setattr(structify, "generate_project", fake_generate_project)
+    path = str(tmp_path / "d.sock")
+    thread = _start_daemon(path)
+
+    assert daemon.forward_generate("Platform", str(tmp_path / "out"), path, hierarchical=True)["ok"]
+    assert daemon.forward_generate("Flask app", str(tmp_path / "out"), path)["ok"]
+    assert calls == [True, False]
+
+    _stop_daemon(thread, path)
+
+def test_daemon_captures_output_of_hierarchical_workers(monkeypatch, tmp_path):
+    """
+    Test that warnings printed from hierarchical parsing worker threads reach
+    the client's output, as they would in-process.
+    """
+    from structify.core import parser
+
+    def fake_smart_ai_request(prompt, max_tokens=4096, thinking_budget=None):
+        if "Subsystems:" in prompt:
+            return "fake", "Project Name: Platform\nSubsystems:\n- auth: login\n- billing: payments\n"
+        if "Subsystem: auth" in prompt:
+            raise RuntimeError("quota exceeded")
+        return "fake", "Folders:\n- billing/\nFiles:\n- billing/app.py\n"
+
+    def fake_generate_project(description, output_dir, hierarchical=False):
+        parser.parse_hierarchical(description)
+
+    monkeypatch.setattr(parser, "smart_ai_request", fake_smart_ai_request)
+    monkeypatch.setattr(structify, "generate_project", fake_generate_project)
+    path = str(tmp_path / "d.sock")
+    thread = _start_daemon(path)
+
+    reply = daemon.forward_generate("Platform", str(tmp_path / "out"), path, hierarchical=True)
+    assert reply["ok"]
+    assert "Subsystem 'auth' failed, using its folder only" in reply["output"]
+
+    _stop_daemon(thread, path)
+
+def test_daemon_refuses_mismatched_environment(monkeypatch, tmp_path):
+    """
+    Test that a daemon started with a different API key does not serve the
+    request, so the client runs it in-process instead.
+    """
+    calls = []
+    monkeypatch.setattr(structify, "generate_project", lambda *args, **kwargs: calls.append(args))
+    monkeypatch.setenv("GOOGLE_GEMINI_API_KEY", "daemon-key")
+    path = str(tmp_path / "d.sock")
+    thread = _start_daemon(path)
+
+    monkeypatch.setenv("GOOGLE_GEMINI_API_KEY", "client-key")
+    assert daemon.forward_generate("Flask app", str(tmp_path / "out"), path) is None
+    assert calls == []
+
+    monkeypatch.setenv("GOOGLE_GEMINI_API_KEY", "daemon-key")
+    assert daemon.forward_generate("Flask app", str(tmp_path / "out"), path)["ok"]
+    assert len(calls) == 1
+
+    _stop_daemon(thread, path)
+
+def test_daemon_rejects_non_object_request(tmp_path):
+    """
+    Test that valid JSON that is not an object gets an error reply, not a dropped connection.
+    """
+    path = str(tmp_path / "d.sock")
+    thread = _start_daemon(path)
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        with sock.makefile("rw", encoding="utf-8") as stream:
+            assert json.loads(stream.readline()) == {"status": "ready"}
+            stream.write("[]\n")
+            stream.flush()
+            reply = json.loads(stream.readline())
+    assert reply["ok"] is False
+    assert "JSON object" in reply["error"]
+
+    _stop_daemon(thread, path)
+
+def test_daemon_idle_timeout_shuts_down(tmp_path):
+    """
+    Test that an idle daemon exits on its own and removes its socket.
+    """
+    path = str(tmp_path / "d.sock")
+    thread = _start_daemon(path, idle_timeout=0.2)
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+    assert not os.path.exists(path)
+
+def test_daemon_serves_concurrent_clients(monkeypatch, tmp_path):
+    """
+    Test that parallel invocations are served concurrently by the daemon (none
+    fall back to in-process) and each client only receives its own output.
+    """
+    def slow_generate_project(description, output_dir, hierarchical=False):
+        print(f"start {description}")
+        time.sleep(1)
+        print(f"done {description}")
+
+    monkeypatch.setattr(structify, "generate_project", slow_generate_project)
+    path = str(tmp_path / "d.sock")
+    thread = _start_daemon(path)
+
+    replies = {}
+
+    def client(name):
+        replies[name] = daemon.forward_generate(name, str(tmp_path / name), path)
+
+    start = time.monotonic()
+    clients = [threading.Thread(target=client, args=(f"app{i}",)) for i in range(3)]
+    for c in clients:
+        c.start()
+    for c in clients:
+        c.join(timeout=10)
+    elapsed = time.monotonic() - start
+
+    for name in ("app0", "app1", "app2"):
+        assert replies[name] is not None
+        assert replies[name]["ok"]
+        assert replies[name]["output"] == f"start {name}\ndone {name}\n"
+    assert elapsed < 2.5
+
+    _stop_daemon(thread, path)
+
+def test_busy_daemon_is_running_and_stops_after_request(monkeypatch, tmp_path):
+    """
+    Test that a daemon busy with a request still answers stop, refuses a second
+    daemon on the same socket, and finishes the in-flight request before exiting.
+    """
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking_generate_project(description, output_dir, hierarchical=False):
+        started.set()
+        release.wait(10)
+
+    monkeypatch.setattr(structify, "generate_project", blocking_generate_project)
+    path = str(tmp_path / "d.sock")
+    thread = _start_daemon(path)
+
+    replies = []
+    client = threading.Thread(
+        target=lambda: replies.append(daemon.forward_generate("Flask app", str(tmp_path / "out"), path))
+    )
+    client.start()
+    assert started.wait(10)
+
+    assert daemon.ping(path)
+    with pytest.raises(RuntimeError):
+        daemon.serve(idle_timeout=10, path=path)
+
+    assert daemon.stop(path)
+    release.set()
+    client.join(timeout=10)
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+    assert replies[0]["ok"]
+    assert not os.path.exists(path)
+
+def test_daemon_replaces_stale_socket(tmp_path):
+    """
+    Test that a socket left behind by a dead daemon (connection refused) is replaced.
+    """
+    path = str(tmp_path / "d.sock")
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()
+
+    thread = _start_daemon(path)
+    assert daemon.ping(path)
+    _stop_daemon(thread, path)
+
+def test_socket_path_is_private(monkeypatch, tmp_path):
+    """
+    Test that the default socket lives in $XDG_RUNTIME_DIR or a per-user directory,
+    not directly in the shared temp dir.
+    """
+    monkeypatch.delenv(daemon.SOCKET_ENV_VAR, raising=False)
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    assert daemon.socket_path() == str(tmp_path / "structify.sock")
+
+    monkeypatch.delenv("XDG_RUNTIME_DIR")
+    assert os.path.dirname(daemon.socket_path()).endswith(f"structify-{os.getuid()}")
@@ -1,4 +1,5 @@
 import pytest
+from structify.core import parser
 from structify.core.parser import parse
 
 def test_parse_generic():
@@ -8,4 +9,51 @@ def test_parse_generic():
     desc = "A generic Python project"
     result = parse(desc, use_gemini=False)
     assert "folders" in result
-    assert "files" in result
\ No newline at end of file
+    assert "files" in result
+
+def test_parse_hierarchical_merges_subsystems(monkeypatch):
+    """
+    Test that parse_hierarchical splits into subsystems, parses each one and
+    merges them with deduplication and path-conflict resolution.
+    """
+    responses = {
+        "auth": "Features:\n- JWT\nFolders:\n- auth/\nFiles:\n- auth/app.py\n- README.md\n- shared\n",
+        "billing": "Features:\n- jwt\n- Stripe\nFolders:\n- ./billing/\n- shared/\nFiles:\n- billing/app.py\n- README.md\n",
+    }
+
+    split_calls = []
+
+    def fake_smart_ai_request(prompt, max_tokens=4096, thinking_budget=None):
+        if "Subsystems:" in prompt:
+            split_calls.append((max_tokens, thinking_budget))
+            return "fake", "Project Name: Platform\nProject Type: microservices\nFeatures:\n- Docker\nSubsystems:\n- auth: login\n- billing: payments\n"
+        for name, text in responses.items():
+            if f"Subsystem: {name}" in prompt:
+                return "fake", text
+        raise AssertionError("unexpected prompt")
+
+    monkeypatch.setattr(parser, "smart_ai_request", fake_smart_ai_request)
+    result = parser.parse_hierarchical("Microservices platform with auth and billing")
+
+    assert result["project_name"] == "Platform"
+    assert result["subsystems"] == ["auth", "billing"]
+    assert result["folders"] == ["auth", "billing", "shared"]
+    assert result["files"] == ["README.md", "auth/app.py", "billing/app.py"]
+    assert result["features"] == ["Docker", "JWT", "Stripe"]
+    # Thinking is disabled so it cannot exhaust the small split budget
+    assert split_calls == [(parser.SPLIT_MAX_TOKENS, 0)]
+
+def test_session_is_per_thread_with_shared_pool():
+    """
+    Test that each thread gets its own requests.Session, all sharing one connection pool.
+    """
+    import threading
+    sessions = []
+    thread = threading.Thread(target=lambda: sessions.append(parser._session()))
+    thread.start()
+    thread.join()
+
+    assert parser._session() is parser._session()
+    assert sessions[0] is not parser._session()
+    assert sessions[0].get_adapter("https://example.com") is parser._ADAPTER
+    assert parser._session().get_adapter("https://example.com") is parser._ADAPTER